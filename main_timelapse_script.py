@@ -7,19 +7,31 @@ Vibe coded by Claude. Prompted by Alistair Bailey
 """
 
 import os
+import argparse
+import atexit
 import sys
 import time
 import json
+import random
+import re
 import datetime
+import functools
 import subprocess
 import logging
+import logging.handlers
 import base64
+import concurrent.futures
+import mmap
 import urllib.parse
+import zoneinfo
+from dataclasses import dataclass
 from pathlib import Path
 
 # Import packages (use system packages to avoid virtual environment issues)
 try:
     import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
 except ImportError:
     print("Error: requests not installed. Run: sudo apt install python3-requests")
     sys.exit(1)
@@ -38,6 +50,12 @@ except ImportError:
         print("Error: astral not installed. Run: sudo apt install python3-astral")
         sys.exit(1)
 
+try:
+    # Optional: faster JSON encoding for request bodies
+    import orjson
+except ImportError:
+    orjson = None
+
 # Configuration for Southampton, UK
 CONFIG = {
     "location": {
@@ -60,35 +78,176 @@ CONFIG = {
         "height": 800,
         "ev": 0.5,
         "start_before_sunrise_minutes": 45,  # Start 45 min before sunrise
+        "pipe_to_ffmpeg": True,  # Stream libcamera-vid straight into ffmpeg
+        "keep_raw": False,  # Also tee the raw H.264 to raw_dir (debugging / re-encode fallback)
+    },
+    "analysis_photo": {
+        # Sized for the Groq vision model: small upload, fewer image tokens
+        "width": 800,
+        "height": 800,
+        "quality": 80,
     },
     "video": {
         "output_duration_seconds": 30,  # 30-second final video
         "crf": 23,  # Good quality, reasonable file size
         "preset": "ultrafast",  # Fast encoding for Pi Zero 2 W
+        "hw_encoder": "h264_v4l2m2m",  # V4L2 M2M hardware H.264 encoder
+        "bitrate": "2M",  # Hardware encoder ignores -crf, use a bitrate
+        # Rewrite timestamps with -c copy instead of re-encoding. Keeps every frame,
+        # so output is about the raw size; only used within the limits below
+        "stream_copy": False,
+        "max_copy_fps": 60,  # Higher output rates re-encode instead
+        "max_size_mb": 50,  # Bluesky's video upload limit
+        "threads": 3,  # Leave one of the Pi's four cores free for libcamera-vid
     },
     "paths": {
-        "base_dir": f'{os.path.expanduser("~")}/sunrise_timelapse',
-        "video_dir": f'{os.path.expanduser("~")}/sunrise_timelapse/videos',
-        "raw_dir": f'{os.path.expanduser("~")}/sunrise_timelapse/raw_videos',
-        "log_dir": f'{os.path.expanduser("~")}/sunrise_timelapse/logs',
+        "base_dir": f'{Path.home()}/sunrise_timelapse',
+        "video_dir": f'{Path.home()}/sunrise_timelapse/videos',
+        "raw_dir": f'{Path.home()}/sunrise_timelapse/raw_videos',
+        "log_dir": f'{Path.home()}/sunrise_timelapse/logs',
+        "cache_dir": f'{Path.home()}/sunrise_timelapse/cache',
+        "outbox_dir": f'{Path.home()}/sunrise_timelapse/outbox',
     },
     "cleanup": {"keep_days": 7, "auto_cleanup": True},
+    # Hand finished videos to a separate poster (--post-outbox) instead of posting inline
+    "outbox": {"enabled": False},
 }
 
+# Resolve configured paths once at import time
+PATHS = {key: Path(value) for key, value in CONFIG['paths'].items()}
+
+@dataclass(frozen=True, slots=True)
+class RunContext:
+    """Dates and times for one capture run, computed once and passed down"""
+    today: datetime.date
+    sunrise: datetime.datetime
+    today_str: str
+    sunrise_str: str
+
+# Post text used when no analysis photo could be taken
+NO_PHOTO_DESCRIPTION = "This morning in Southampton the weather is looking beautiful for this sunrise timelapse! 🌅"
+# Used when Groq is unconfigured or fails
+FALLBACK_DESCRIPTION = "Dawn in Southampton. Again."
+
+# YYYY-MM-DD date embedded in output filenames
+_DATE_RE = re.compile(r'(\d{4})-(\d{2})-(\d{2})')
+
+def dumps_json(obj):
+    """Serialise obj to JSON bytes, using orjson when it is installed"""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj).encode()
+
+# Stands in for the base64 image inside a JSON payload until it is streamed
+IMAGE_PLACEHOLDER = "@@IMAGE_BASE64@@"
+
+class StreamingJSONBody:
+    """JSON request body that streams a base64-encoded buffer in place of a placeholder
+
+    Peak memory is one chunk rather than the whole encoded image. Defining
+    __len__ lets requests send a Content-Length instead of chunked encoding.
+    """
+
+    CHUNK_SIZE = 3 * 16384  # Multiple of 3 so chunks encode without padding
+
+    def __init__(self, payload, placeholder, data):
+        self.before, self.after = dumps_json(payload).split(placeholder.encode(), 1)
+        self.data = data
+
+    def __len__(self):
+        return len(self.before) + 4 * ((len(self.data) + 2) // 3) + len(self.after)
+
+    def __iter__(self):
+        yield self.before
+        for offset in range(0, len(self.data), self.CHUNK_SIZE):
+            yield base64.b64encode(self.data[offset:offset + self.CHUNK_SIZE])
+        yield self.after
+
+class FileChunks:
+    """Sized iterable over an open file in fixed-size reads, for streaming uploads
+
+    http.client would otherwise read file bodies 8 KiB at a time.
+    """
+
+    CHUNK_SIZE = 1024 * 1024
+
+    def __init__(self, f, size):
+        self.f = f
+        self.size = size
+
+    def __len__(self):
+        return self.size
+
+    def __iter__(self):
+        while chunk := self.f.read(self.CHUNK_SIZE):
+            yield chunk
+
+@functools.cache
+def _plc_session():
+    """Keep-alive session for plc.directory, created on first DID lookup"""
+    return make_http_session()
+
+@functools.lru_cache(maxsize=4)
+def _pds_did_for(did):
+    """Resolve a DID to its PDS service DID via plc.directory
+
+    Failures raise rather than return None so they aren't cached.
+    """
+    # Own session: only the public DID document is needed, never the bearer token
+    response = _plc_session().get(f"https://plc.directory/{did}", timeout=30)
+    if response.status_code != 200:
+        raise RuntimeError(f"Failed to get DID document: {response.status_code}")
+
+    did_doc = response.json()
+    # Look for the PDS service
+    for service in did_doc.get('service', []):
+        if service.get('id') == '#atproto_pds':
+            pds_url = service.get('serviceEndpoint', '')
+            if pds_url:
+                # Extract domain and create DID
+                parsed = urllib.parse.urlparse(pds_url)
+                return f"did:web:{parsed.netloc}"
+    raise RuntimeError("Could not find PDS service in DID document")
+
+def make_http_session():
+    """Build a pooled keep-alive requests.Session with retries on gateway errors"""
+    session = requests.Session()
+    session.headers["User-Agent"] = "pi-sunrise/1.0"
+    adapter = HTTPAdapter(
+        pool_connections=4,
+        pool_maxsize=8,
+        # Hand the last error response back rather than raising, and leave
+        # Retry-After to callers (the job-status poll has its own backoff)
+        max_retries=Retry(
+            total=3,
+            backoff_factor=0.5,
+            status_forcelist=[502, 503, 504],
+            raise_on_status=False,
+            respect_retry_after_header=False
+        )
+    )
+    session.mount('https://', adapter)
+    return session
+
 class FixedBlueSkyClient:
     """FIXED Bluesky client using correct video service API"""
 
-    def __init__(self):
+    def __init__(self, session=None):
         self.access_token = None
         self.did = None
         self.handle = None
         self.server = CONFIG['bluesky']['server']
         self.video_server = 'https://video.bsky.app'
+        self._svc_auth = None
+        self._svc_auth_exp = 0
+
+        # Keep-alive session so TCP/TLS setup is paid once per host
+        self.session = session or make_http_session()
 
     def create_session(self, identifier, password):
         """Create authenticated session"""
         try:
-            response = requests.post(
+            response = self.session.post(
                 f"{self.server}/xrpc/com.atproto.server.createSession",
                 json={
                     "identifier": identifier,
@@ -115,31 +274,16 @@ class FixedBlueSkyClient:
     def get_user_pds_did(self):
         """Get the user's PDS DID from their profile"""
         try:
-            # Get the user's DID document to find their PDS
-            response = requests.get(f"https://plc.directory/{self.did}", timeout=30)
-
-            if response.status_code == 200:
-                did_doc = response.json()
-                # Look for the PDS service
-                services = did_doc.get('service', [])
-                for service in services:
-                    if service.get('id') == '#atproto_pds':
-                        pds_url = service.get('serviceEndpoint', '')
-                        if pds_url:
-                            # Extract domain and create DID
-                            parsed = urllib.parse.urlparse(pds_url)
-                            return f"did:web:{parsed.netloc}"
-                print("❌ Could not find PDS service in DID document")
-                return None
-            else:
-                print(f"❌ Failed to get DID document: {response.status_code}")
-                return None
+            return _pds_did_for(self.did)
         except Exception as e:
             print(f"❌ Error getting PDS DID: {e}")
             return None
 
     def get_service_auth(self):
-        """Get service auth token for video uploads"""
+        """Get service auth token for video uploads (cached until near expiry)"""
+        if self._svc_auth and time.time() < self._svc_auth_exp - 60:
+            return self._svc_auth
+
         try:
             pds_did = self.get_user_pds_did()
             if not pds_did:
@@ -148,13 +292,14 @@ class FixedBlueSkyClient:
 
             print(f"🔍 Using PDS DID: {pds_did}")
 
-            response = requests.get(
+            requested_exp = int(time.time()) + 1800  # 30 minutes
+            response = self.session.get(
                 f"{self.server}/xrpc/com.atproto.server.getServiceAuth",
                 headers={"Authorization": f"Bearer {self.access_token}"},
                 params={
                     "aud": pds_did,  # Use the user's PDS DID
                     "lxm": "com.atproto.repo.uploadBlob",  # Use uploadBlob
-                    "exp": int(time.time()) + 1800  # 30 minutes
+                    "exp": requested_exp
                 },
                 timeout=30
             )
@@ -162,6 +307,8 @@ class FixedBlueSkyClient:
             if response.status_code == 200:
                 service_auth = response.json()["token"]
                 print(f"✅ Got service auth token for video uploads")
+                self._svc_auth = service_auth
+                self._svc_auth_exp = self._token_expiry(service_auth, requested_exp)
                 return service_auth
             else:
                 print(f"❌ Service auth failed: {response.status_code} - {response.text}")
@@ -170,6 +317,16 @@ class FixedBlueSkyClient:
             print(f"❌ Service auth error: {e}")
             return None
 
+    @staticmethod
+    def _token_expiry(token, default):
+        """Read the exp claim from a JWT payload, falling back to default"""
+        try:
+            payload = token.split('.')[1]
+            claims = json.loads(base64.urlsafe_b64decode(payload + '=' * (-len(payload) % 4)))
+            return int(claims.get('exp', default))
+        except Exception:
+            return default
+
     def wait_for_video_processing(self, job_id):
         """Wait for video processing to complete"""
         try:
@@ -180,9 +337,14 @@ class FixedBlueSkyClient:
             if not service_auth:
                 return None
 
-            max_attempts = 30  # Wait up to 5 minutes (30 * 10 seconds)
+            # Exponential backoff with jitter, bounded by a 5 minute deadline
+            deadline = time.time() + 300
+            max_attempts = 40
             for attempt in range(max_attempts):
-                response = requests.get(
+                if time.time() >= deadline:
+                    break
+
+                response = self.session.get(
                     f"{self.video_server}/xrpc/app.bsky.video.getJobStatus",
                     headers={
                         "Authorization": f"Bearer {service_auth}"
@@ -193,13 +355,15 @@ class FixedBlueSkyClient:
                     timeout=30
                 )
 
+                delay = min(15, 2 * 1.5 ** attempt) + random.uniform(0, 0.5)
+
                 if response.status_code == 200:
                     job_status_response = response.json()
                     # The actual job status is nested inside jobStatus
                     job_status = job_status_response.get("jobStatus", {})
                     state = job_status.get("state")
 
-                    print(f"📊 Job status: {state} (attempt {attempt + 1}/{max_attempts})")
+                    print(f"📊 Job status: {state} (attempt {attempt + 1})")
 
                     if state == "JOB_STATE_COMPLETED":
                         blob_ref = job_status.get("blob")
@@ -218,16 +382,16 @@ class FixedBlueSkyClient:
                         # JOB_STATE_ENCODING is a valid intermediate state
                         if state == "JOB_STATE_ENCODING":
                             print("🎬 Video is being encoded...")
-                        time.sleep(10)
-                        continue
                     else:
                         print(f"⚠️  Unknown job state: {state} - continuing to wait...")
-                        time.sleep(10)
-                        continue
                 else:
                     print(f"❌ Failed to check job status: {response.status_code} - {response.text}")
-                    time.sleep(10)
-                    continue
+                    if response.status_code in (429, 503):
+                        retry_after = response.headers.get("Retry-After", "")
+                        if retry_after.isdigit():
+                            delay = max(delay, int(retry_after))
+
+                time.sleep(max(0, min(delay, deadline - time.time())))
 
             print("❌ Video processing timed out after 5 minutes")
             return None
@@ -245,7 +409,7 @@ class FixedBlueSkyClient:
             if not service_auth:
                 return None
 
-            response = requests.get(
+            response = self.session.get(
                 f"{self.video_server}/xrpc/app.bsky.video.getJobStatus",
                 headers={
                     "Authorization": f"Bearer {service_auth}"
@@ -294,25 +458,25 @@ class FixedBlueSkyClient:
             file_size = os.path.getsize(video_path)
             print(f"📊 Video file size: {file_size / (1024*1024):.1f}MB")
 
-            # Read video file
-            with open(video_path, 'rb') as f:
-                video_data = f.read()
-
             # Use the working approach: URL parameters with both did and name
             encoded_did = urllib.parse.quote(self.did, safe='')
             upload_url = f"{self.video_server}/xrpc/app.bsky.video.uploadVideo?did={encoded_did}&name=video.mp4"
 
             print(f"🔗 Uploading to: {upload_url}")
 
-            response = requests.post(
-                upload_url,
-                headers={
-                    "Authorization": f"Bearer {service_auth}",
-                    "Content-Type": "video/mp4"
-                },
-                data=video_data,
-                timeout=600
-            )
+            # Stream the file in 1 MiB reads rather than loading it into RAM.
+            # Explicit Content-Length avoids chunked transfer-encoding.
+            with open(video_path, 'rb') as f:
+                response = self.session.post(
+                    upload_url,
+                    headers={
+                        "Authorization": f"Bearer {service_auth}",
+                        "Content-Type": "video/mp4",
+                        "Content-Length": str(file_size)
+                    },
+                    data=FileChunks(f, file_size),
+                    timeout=600
+                )
 
             print(f"DEBUG: Video upload response status: {response.status_code}")
 
@@ -322,8 +486,12 @@ class FixedBlueSkyClient:
 
                 job_id = upload_result.get("jobId")
                 if job_id:
-                    # Wait for processing to complete and get blob reference
-                    blob_ref = self.wait_for_video_processing(job_id)
+                    # The upload response is a job status; skip polling if it's already done
+                    if upload_result.get("state") == "JOB_STATE_COMPLETED" and upload_result.get("blob"):
+                        blob_ref = upload_result["blob"]
+                    else:
+                        # Wait for processing to complete and get blob reference
+                        blob_ref = self.wait_for_video_processing(job_id)
                     if blob_ref:
                         # Return the blob reference in the expected format
                         return {
@@ -347,8 +515,8 @@ class FixedBlueSkyClient:
                 state = upload_result.get("state")
 
                 if state == "JOB_STATE_COMPLETED" and job_id:
-                    # Get the blob reference from the completed job
-                    blob_ref = self.get_completed_job_blob(job_id)
+                    # Use the blob from the 409 response if present, else ask the job
+                    blob_ref = upload_result.get("blob") or self.get_completed_job_blob(job_id)
                     if blob_ref:
                         return {
                             "blob": blob_ref,
@@ -396,17 +564,17 @@ class FixedBlueSkyClient:
             print(f"DEBUG: Post record: {json.dumps(record, indent=2, default=str)}")
 
             # Create the post
-            response = requests.post(
+            response = self.session.post(
                 f"{self.server}/xrpc/com.atproto.repo.createRecord",
                 headers={
                     "Authorization": f"Bearer {self.access_token}",
                     "Content-Type": "application/json"
                 },
-                json={
+                data=dumps_json({
                     "repo": self.did,
                     "collection": "app.bsky.feed.post",
                     "record": record
-                },
+                }),
                 timeout=30
             )
 
@@ -424,23 +592,49 @@ class FixedBlueSkyClient:
 
 class SunriseTimelapse:
     def __init__(self):
+        self._video_encoder = None
+        self._sunrise_tables = {}
+        self.raw_dir = PATHS['raw_dir']
+        self.video_dir = PATHS['video_dir']
+        self.keep_days = CONFIG['cleanup']['keep_days']
+        self.auto_cleanup = CONFIG['cleanup']['auto_cleanup']
         self.setup_logging()
         self.setup_directories()
         self.setup_location()
 
+    @functools.cached_property
+    def http(self):
+        """Pooled keep-alive session shared by main-thread Groq and Bluesky calls (created on first use)
+
+        requests.Session isn't thread-safe, so an upload on a worker thread gets its own.
+        """
+        return make_http_session()
+
     def setup_logging(self):
         """Setup logging configuration"""
-        log_dir = Path(CONFIG['paths']['log_dir'])
+        log_dir = PATHS['log_dir']
         log_dir.mkdir(parents=True, exist_ok=True)
 
         today = datetime.date.today().strftime('%Y-%m-%d')
         log_file = log_dir / f"sunrise_{today}.log"
 
+        # Buffer file writes so each record isn't its own SD card write;
+        # errors flush immediately and anything left is flushed at exit
+        log_format = '%(asctime)s - %(levelname)s - %(message)s'
+        file_target = logging.FileHandler(log_file)
+        file_target.setFormatter(logging.Formatter(log_format))
+        file_handler = logging.handlers.MemoryHandler(
+            capacity=256,
+            flushLevel=logging.ERROR,
+            target=file_target
+        )
+        atexit.register(file_handler.flush)
+
         logging.basicConfig(
             level=logging.INFO,
-            format='%(asctime)s - %(levelname)s - %(message)s',
+            format=log_format,
             handlers=[
-                logging.FileHandler(log_file),
+                file_handler,
                 logging.StreamHandler()
             ]
         )
@@ -448,12 +642,14 @@ class SunriseTimelapse:
 
     def setup_directories(self):
         """Create necessary directories"""
-        for path_key in ['video_dir', 'raw_dir', 'log_dir']:
-            Path(CONFIG['paths'][path_key]).mkdir(parents=True, exist_ok=True)
+        for path_key in ['video_dir', 'raw_dir', 'log_dir', 'cache_dir', 'outbox_dir']:
+            PATHS[path_key].mkdir(parents=True, exist_ok=True)
 
     def setup_location(self):
         """Setup location for sunrise calculations"""
         loc = CONFIG['location']
+        # Load tzdata once here rather than on every sunrise lookup
+        self.local_tz = zoneinfo.ZoneInfo(loc['timezone'])
         if ASTRAL_VERSION == "new":
             self.location = LocationInfo(
                 loc['name'],
@@ -473,25 +669,70 @@ class SunriseTimelapse:
                 0  # elevation
             ))
 
-    def get_sunrise_time(self, date=None):
-        """Get sunrise time for given date (today if None)"""
-        if date is None:
-            date = datetime.date.today()
-
+    def calculate_sunrise_time(self, date):
+        """Calculate local sunrise time for date (raises on failure)"""
+        sunrise_local = None
         try:
+            sunrise_local = self.get_pvlib_sunrise(date)
+        except Exception as e:
+            self.logger.warning(f"pvlib sunrise failed for {date}, using astral: {e}")
+
+        if sunrise_local is None:
             if ASTRAL_VERSION == "new":
                 s = sun(self.location.observer, date=date)
                 sunrise_utc = s['sunrise']
                 # Convert UTC to local timezone
-                import zoneinfo
-                local_tz = zoneinfo.ZoneInfo('Europe/London')
-                sunrise_local = sunrise_utc.astimezone(local_tz).replace(tzinfo=None)
+                sunrise_local = sunrise_utc.astimezone(self.local_tz).replace(tzinfo=None)
             else:
                 # Older astral API should handle this automatically
                 sunrise_utc = self.location.sunrise(date)
-                import zoneinfo
-                local_tz = zoneinfo.ZoneInfo('Europe/London')
-                sunrise_local = sunrise_utc.astimezone(local_tz).replace(tzinfo=None)
+                sunrise_local = sunrise_utc.astimezone(self.local_tz).replace(tzinfo=None)
+
+        return sunrise_local
+
+    def get_sunrise_table(self, year):
+        """Load (or build and save) the {iso_date: iso_time} sunrise table for year"""
+        if year in self._sunrise_tables:
+            return self._sunrise_tables[year]
+
+        cache_file = PATHS['cache_dir'] / f"sunrise_{year}.json"
+        try:
+            with open(cache_file) as f:
+                table = json.load(f)
+        except (OSError, ValueError):
+            self.logger.info(f"Building sunrise table for {year}...")
+            table = {}
+            day = datetime.date(year, 1, 1)
+            while day.year == year:
+                try:
+                    table[day.isoformat()] = self.calculate_sunrise_time(day).time().isoformat(timespec='seconds')
+                except Exception:
+                    pass  # Leave gaps to be calculated (or fall back) on the day
+                day += datetime.timedelta(days=1)
+
+            # Write atomically so a crash never leaves a truncated cache
+            try:
+                tmp_file = cache_file.with_suffix('.json.tmp')
+                with open(tmp_file, 'w') as f:
+                    json.dump(table, f)
+                os.replace(tmp_file, cache_file)
+            except OSError as e:
+                self.logger.warning(f"Could not save sunrise table: {e}")
+
+        self._sunrise_tables[year] = table
+        return table
+
+    def get_sunrise_time(self, date=None):
+        """Get sunrise time for given date (today if None)"""
+        if date is None:
+            date = datetime.date.today()
+
+        try:
+            cached = self.get_sunrise_table(date.year).get(date.isoformat())
+            if cached:
+                sunrise_local = datetime.datetime.combine(date, datetime.time.fromisoformat(cached))
+            else:
+                sunrise_local = self.calculate_sunrise_time(date)
 
             self.logger.info(f"Sunrise time for {date}: {sunrise_local.strftime('%H:%M:%S')}")
             return sunrise_local
@@ -503,6 +744,43 @@ class SunriseTimelapse:
             self.logger.warning(f"Using fallback sunrise time: {fallback_time}")
             return fallback_time
 
+    def get_pvlib_sunrise(self, date):
+        """Sunrise for date from pvlib's NREL SPA, or None if pvlib is missing or the sun doesn't rise"""
+        try:
+            # Optional and heavy, so only imported when a sunrise table is built
+            # (JIT-compiled when numba is present)
+            import pandas as pd
+            import pvlib
+        except ImportError:
+            return None
+
+        loc = CONFIG['location']
+        start = pd.Timestamp(date, tz=self.local_tz)
+        times = pd.date_range(start, start + pd.Timedelta(days=1), freq='1min', inclusive='left')
+
+        solpos = pvlib.solarposition.get_solarposition(
+            times, loc['latitude'], loc['longitude'], method='nrel_numba'
+        )
+        # -0.833° matches astral's definition (refraction plus solar disc radius)
+        above = (solpos['elevation'] >= -0.833).to_numpy()
+        rising = above[1:] & ~above[:-1]
+        if not rising.any():
+            return None
+        return times[rising.argmax() + 1].to_pydatetime().replace(tzinfo=None)
+
+    def make_run_context(self, date=None, sunrise=None):
+        """Build the RunContext for date (today if None), looking up sunrise if not given"""
+        if date is None:
+            date = datetime.date.today()
+        if sunrise is None:
+            sunrise = self.get_sunrise_time(date)
+        return RunContext(
+            today=date,
+            sunrise=sunrise,
+            today_str=date.strftime('%Y-%m-%d'),
+            sunrise_str=sunrise.strftime('%H:%M:%S')
+        )
+
     def wait_until_start_time(self, start_time):
         """Wait until it's time to start capturing"""
         now = datetime.datetime.now()
@@ -514,61 +792,56 @@ class SunriseTimelapse:
         wait_seconds = (start_time - now).total_seconds()
         self.logger.info(f"Waiting {int(wait_seconds/60)} minutes until {start_time.strftime('%H:%M:%S')}")
 
-        while datetime.datetime.now() < start_time:
-            remaining = start_time - datetime.datetime.now()
-            if remaining.total_seconds() > 60:
-                time.sleep(60)  # Check every minute
-                minutes_left = int(remaining.total_seconds() / 60)
-                if minutes_left % 5 == 0:  # Log every 5 minutes
-                    self.logger.info(f"{minutes_left} minutes until capture starts...")
-            else:
-                time.sleep(5)  # Check every 5 seconds when close
+        # Sleep straight through to a couple of log checkpoints rather than waking every minute
+        for minutes_left in (5, 1):
+            checkpoint = start_time - datetime.timedelta(minutes=minutes_left)
+            delta = (checkpoint - datetime.datetime.now()).total_seconds()
+            if delta > 0:
+                time.sleep(delta)
+                self.logger.info(f"{minutes_left} minutes until capture starts...")
+
+        time.sleep(max(0, (start_time - datetime.datetime.now()).total_seconds()))
 
     def get_free_memory(self):
         """Get available memory in MB"""
         try:
-            result = subprocess.run(['free', '-m'], capture_output=True, text=True, timeout=30)
-            lines = result.stdout.strip().split('\n')
-            mem_line = lines[1].split()
-            return int(mem_line[6])  # Available memory
+            # Read /proc/meminfo directly rather than forking `free -m`
+            with open('/proc/meminfo', 'rb') as f:
+                data = f.read()
+            for line in data.splitlines():
+                if line.startswith(b'MemAvailable:'):
+                    return int(line.split()[1]) // 1024  # kB -> MB
+            return 0
         except Exception as e:
             self.logger.warning(f"Could not get memory info: {e}")
             return 0
 
-    def capture_sunrise_video(self):
-        """Capture 75-minute sunrise as continuous video"""
-        sunrise_time = self.get_sunrise_time()
+    def wait_for_capture_window(self, output_path, ctx):
+        """Log today's capture schedule and wait until capture should start"""
         capture_config = CONFIG['capture']
 
         # Calculate start time (45 minutes before sunrise)
         start_offset = datetime.timedelta(minutes=capture_config['start_before_sunrise_minutes'])
-        start_time = sunrise_time - start_offset
+        start_time = ctx.sunrise - start_offset
         end_time = start_time + datetime.timedelta(minutes=capture_config['duration_minutes'])
 
-        # Create raw video file for today
-        today = datetime.date.today().strftime('%Y-%m-%d')
-        raw_dir = Path(CONFIG['paths']['raw_dir'])
-        raw_video_path = raw_dir / f"sunrise_raw_{today}.h264"
-
         self.logger.info(f"=== Sunrise Video Capture ===")
-        self.logger.info(f"Date: {today}")
-        self.logger.info(f"Sunrise time: {sunrise_time.strftime('%H:%M:%S')}")
+        self.logger.info(f"Date: {ctx.today_str}")
+        self.logger.info(f"Sunrise time: {ctx.sunrise_str}")
         self.logger.info(f"Capture start: {start_time.strftime('%H:%M:%S')}")
         self.logger.info(f"Capture end: {end_time.strftime('%H:%M:%S')}")
         self.logger.info(f"Duration: {capture_config['duration_minutes']} minutes")
-        self.logger.info(f"Raw video file: {raw_video_path}")
+        self.logger.info(f"Output file: {output_path}")
 
         # Wait until start time
         self.wait_until_start_time(start_time)
 
-        # Calculate timeout in milliseconds
+    def build_capture_cmd(self, output):
+        """Build the libcamera-vid command writing H.264 to output ('-' for stdout)"""
+        capture_config = CONFIG['capture']
         timeout_ms = capture_config['duration_minutes'] * 60 * 1000
 
-        self.logger.info("=== Starting video capture ===")
-        memory_before = self.get_free_memory()
-
-        # Capture using libcamera-vid
-        cmd = [
+        return [
             'libcamera-vid',
             '--width', str(capture_config['width']),
             '--height', str(capture_config['height']),
@@ -576,25 +849,54 @@ class SunriseTimelapse:
             '--timeout', str(timeout_ms),
             '--ev', str(capture_config['ev']),
             '--nopreview',
-            '-o', str(raw_video_path)
+            '-o', str(output)
         ]
 
+    def monitor_capture(self, process, start_capture):
+        """Block until the capture process exits, waking every 5 minutes to log
+
+        A capture still running a minute past its timeout is treated as hung and killed.
+        """
+        capture_seconds = CONFIG['capture']['duration_minutes'] * 60
+        deadline = start_capture + capture_seconds + 60
+
+        # communicate() keeps draining the pipes so a chatty stderr can't stall capture
+        next_log = start_capture + 300
+        while True:
+            try:
+                return process.communicate(timeout=max(1, min(next_log, deadline) - time.time()))
+            except subprocess.TimeoutExpired:
+                if time.time() >= deadline:
+                    self.logger.error("Video capture hung past its timeout, killing it")
+                    process.kill()
+                    return process.communicate()
+                elapsed = time.time() - start_capture
+                remaining = capture_seconds - elapsed
+                memory_now = self.get_free_memory()
+                self.logger.info(f"Capturing... {elapsed/60:.1f}min elapsed, {remaining/60:.1f}min remaining - {memory_now}MB free")
+                next_log += 300
+
+    def capture_sunrise_video(self, ctx=None):
+        """Capture 75-minute sunrise as continuous video"""
+        ctx = ctx or self.make_run_context()
+
+        # Create raw video file for today
+        raw_video_path = self.raw_dir / f"sunrise_raw_{ctx.today_str}.h264"
+
+        self.wait_for_capture_window(raw_video_path, ctx)
+
+        self.logger.info("=== Starting video capture ===")
+        memory_before = self.get_free_memory()
+
+        # Capture using libcamera-vid
+        cmd = self.build_capture_cmd(raw_video_path)
+
         try:
             start_capture = time.time()
 
             # Run the video capture with progress monitoring
             process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
-
-            start_time_monitor = time.time()
-            while process.poll() is None:
-                elapsed = time.time() - start_time_monitor
-                if elapsed > 300 and elapsed % 300 < 1:  # Log every 5 minutes
-                    remaining = (timeout_ms / 1000) - elapsed
-                    memory_now = self.get_free_memory()
-                    self.logger.info(f"Capturing... {elapsed/60:.1f}min elapsed, {remaining/60:.1f}min remaining - {memory_now}MB free")
-                time.sleep(30)  # Check every 30 seconds instead of 1 second
-
-            stdout, stderr = process.communicate()
+            stdout, stderr = self.monitor_capture(process, start_capture)
 
             capture_time = time.time() - start_capture
             memory_after = self.get_free_memory()
@@ -619,21 +921,211 @@ class SunriseTimelapse:
             self.logger.error(f"Video capture error: {e}")
             return None
 
-    def create_timelapse_from_video(self, raw_video_path):
+    def get_video_encoder(self):
+        """Return the hardware H.264 encoder if ffmpeg has it, else libx264 (probed once)"""
+        if self._video_encoder:
+            return self._video_encoder
+
+        hw_encoder = CONFIG['video']['hw_encoder']
+        try:
+            result = subprocess.run(
+                ['ffmpeg', '-hide_banner', '-encoders'],
+                capture_output=True,
+                text=True,
+                timeout=30
+            )
+            available = hw_encoder in result.stdout
+        except Exception as e:
+            self.logger.warning(f"Could not probe ffmpeg encoders: {e}")
+            available = False
+
+        self._video_encoder = hw_encoder if available else 'libx264'
+        self.logger.info(f"Using video encoder: {self._video_encoder}")
+        return self._video_encoder
+
+    def get_encoder_args(self):
+        """FFmpeg video codec arguments for the selected encoder"""
+        video_config = CONFIG['video']
+        encoder = self.get_video_encoder()
+        threads = ['-threads', str(video_config['threads'])]
+        if encoder == 'libx264':
+            return ['-c:v', 'libx264', '-preset', video_config['preset'], '-crf', str(video_config['crf']), *threads]
+        return ['-c:v', encoder, '-b:v', video_config['bitrate'], *threads]
+
+    def get_speedup_factor(self):
+        """Speed-up factor turning the full capture into the target output duration"""
+        capture_duration = CONFIG['capture']['duration_minutes'] * 60  # seconds
+        return capture_duration / CONFIG['video']['output_duration_seconds']  # 150x for 75min→30sec
+
+    def use_stream_copy(self, speedup_factor):
+        """Whether a -c copy remux is enabled and would give a playable output rate"""
+        video_config = CONFIG['video']
+        new_fps = CONFIG['capture']['framerate'] * speedup_factor
+        return video_config['stream_copy'] and new_fps <= video_config['max_copy_fps']
+
+    def capture_sunrise_timelapse(self, ctx=None):
+        """Capture the sunrise and build the timelapse in one pass by piping libcamera-vid into ffmpeg"""
+        ctx = ctx or self.make_run_context()
+        video_config = CONFIG['video']
+        final_video_path = self.video_dir / f"sunrise_{ctx.today_str}.mp4"
+        raw_video_path = self.raw_dir / f"sunrise_raw_{ctx.today_str}.h264"
+        speedup_factor = self.get_speedup_factor()
+
+        # Raw H.264 on stdin carries no timestamps, so the input rate must be declared
+        stream_copy = self.use_stream_copy(speedup_factor)
+        if stream_copy:
+            new_fps = CONFIG['capture']['framerate'] * speedup_factor
+            codec_args = ['-r', f'{new_fps:g}', '-i', '-', '-c', 'copy']
+        else:
+            codec_args = [
+                '-r', str(CONFIG['capture']['framerate']), '-i', '-',
+                '-filter:v', f'setpts=PTS/{speedup_factor}',
+                *self.get_encoder_args(),
+                '-pix_fmt', 'yuv420p'
+            ]
+        ffmpeg_cmd = [
+            'ffmpeg', '-y', '-hide_banner', '-loglevel', 'error',
+            '-f', 'h264',
+            *codec_args,
+            '-movflags', '+faststart',
+            str(final_video_path)
+        ]
+
+        self.wait_for_capture_window(final_video_path, ctx)
+
+        self.logger.info("=== Starting piped capture ===")
+        memory_before = self.get_free_memory()
+
+        procs = []
+        try:
+            start_capture = time.time()
+
+            # Binary H.264 on stdout; only stderr is decoded, below
+            capture = subprocess.Popen(self.build_capture_cmd('-'), stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+            procs.append(capture)
+
+            stream = capture.stdout
+            tee = None
+            keep_raw = CONFIG['capture']['keep_raw']
+            if keep_raw:
+                # Opt-in: writes the full raw stream to the SD card, but lets a failed
+                # ffmpeg fall back to a re-encode. warn-nopipe keeps tee writing if ffmpeg dies.
+                tee = subprocess.Popen(
+                    ['tee', '--output-error=warn-nopipe', str(raw_video_path)],
+                    stdin=stream,
+                    stdout=subprocess.PIPE
+                )
+                procs.append(tee)
+                stream.close()
+                stream = tee.stdout
+
+            encoder = subprocess.Popen(ffmpeg_cmd, stdin=stream, stderr=subprocess.PIPE, text=True)
+            procs.append(encoder)
+            # Drop the parent's copy so ffmpeg sees EOF when capture ends
+            stream.close()
+
+            _, capture_err = self.monitor_capture(capture, start_capture)
+            if tee:
+                tee.wait()
+            try:
+                _, encode_err = encoder.communicate(timeout=600)
+            except subprocess.TimeoutExpired:
+                encoder.kill()
+                _, encode_err = encoder.communicate()
+                encode_err = f"timed out. {encode_err}"
+
+            capture_time = time.time() - start_capture
+            memory_after = self.get_free_memory()
+
+            if capture.returncode != 0:
+                self.logger.error(f"Video capture failed. Return code: {capture.returncode}")
+                if capture_err:
+                    self.logger.error(f"Error: {capture_err.decode(errors='replace')}")
+                return None
+            if encoder.returncode != 0 or not final_video_path.exists():
+                self.logger.error(f"Piped FFmpeg failed: {encode_err}")
+                if not keep_raw:
+                    self.logger.error("No raw capture kept (keep_raw is off), nothing to fall back to")
+                    return None
+                self.logger.warning("Falling back to processing the raw capture")
+                return self.create_timelapse_from_video(raw_video_path, ctx)
+
+            size_mb = final_video_path.stat().st_size / (1024 * 1024)
+            if stream_copy and size_mb > video_config['max_size_mb']:
+                self.logger.warning(f"Stream copy output too large to post ({size_mb:.1f}MB)")
+                if keep_raw:
+                    self.logger.warning("Re-encoding the raw capture")
+                    return self.create_timelapse_from_video(raw_video_path, ctx)
+
+            self.logger.info("=== Piped Capture Success ===")
+            self.logger.info(f"Final size: {size_mb:.1f}MB")
+            self.logger.info(f"Capture duration: {capture_time/60:.1f} minutes")
+            self.logger.info(f"Memory used: {memory_before - memory_after}MB")
+            return final_video_path
+
+        except Exception as e:
+            self.logger.error(f"Piped capture error: {e}")
+            for proc in procs:
+                if proc.poll() is None:
+                    proc.kill()
+            return None
+
+    def remux_timelapse(self, raw_video_path, final_video_path, speedup_factor):
+        """Speed up the raw H.264 by rewriting container timestamps (no re-encode)"""
+        # Raw H.264 carries no timestamps, so declaring a higher input rate is the speed-up
+        new_fps = CONFIG['capture']['framerate'] * speedup_factor
+        cmd = [
+            'ffmpeg', '-y',
+            '-r', f'{new_fps:g}',
+            '-i', str(raw_video_path),
+            '-c', 'copy',
+            '-movflags', '+faststart',
+            str(final_video_path)
+        ]
+
+        self.logger.info(f"Remuxing with stream copy at {new_fps:g}fps...")
+        start_time = time.time()
+        try:
+            result = subprocess.run(cmd, capture_output=True, text=True, timeout=600)
+        except subprocess.TimeoutExpired:
+            self.logger.warning("Stream copy timed out, falling back to re-encode")
+            return False
+
+        if result.returncode != 0 or not final_video_path.exists():
+            self.logger.warning(f"Stream copy failed, falling back to re-encode: {result.stderr[-500:]}")
+            return False
+
+        size_mb = final_video_path.stat().st_size / (1024 * 1024)
+        if size_mb > CONFIG['video']['max_size_mb']:
+            self.logger.warning(f"Stream copy output too large to post ({size_mb:.1f}MB), falling back to re-encode")
+            return False
+
+        self.logger.info("=== Video Processing Success (stream copy) ===")
+        self.logger.info(f"Final size: {size_mb:.1f}MB")
+        self.logger.info(f"Processing time: {time.time() - start_time:.1f} seconds")
+        return True
+
+    @staticmethod
+    def parse_ffmpeg_duration(stderr):
+        """Output duration in seconds from the last time= in ffmpeg's stats, or None"""
+        matches = re.findall(r'time=(\d+):(\d+):(\d+(?:\.\d+)?)', stderr or '')
+        if not matches:
+            return None
+        hours, minutes, seconds = matches[-1]
+        return int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+
+    def create_timelapse_from_video(self, raw_video_path, ctx=None):
         """Create 30-second timelapse from raw video"""
         if not raw_video_path or not raw_video_path.exists():
             self.logger.error("No raw video file to process")
             return None
 
+        ctx = ctx or self.make_run_context()
         video_config = CONFIG['video']
-        today = datetime.date.today().strftime('%Y-%m-%d')
-        video_dir = Path(CONFIG['paths']['video_dir'])
-        final_video_path = video_dir / f"sunrise_{today}.mp4"
+        final_video_path = self.video_dir / f"sunrise_{ctx.today_str}.mp4"
 
-        # Calculate speed-up factor for 30-second output
-        capture_duration = CONFIG['capture']['duration_minutes'] * 60  # seconds
         target_duration = video_config['output_duration_seconds']
-        speedup_factor = capture_duration / target_duration  # Should be 150x for 75min→30sec
+        speedup_factor = self.get_speedup_factor()
 
         self.logger.info("=== Creating Final Timelapse ===")
         self.logger.info(f"Input: {raw_video_path}")
@@ -641,21 +1133,25 @@ class SunriseTimelapse:
         self.logger.info(f"Speed-up factor: {speedup_factor:.1f}x")
         self.logger.info(f"Target duration: {target_duration} seconds")
 
+        if self.use_stream_copy(speedup_factor) and self.remux_timelapse(raw_video_path, final_video_path, speedup_factor):
+            return final_video_path
+
         # FFmpeg command to speed up video
+        encoder = self.get_video_encoder()
         cmd = [
             'ffmpeg', '-y',
+            # Raw H.264 carries no timestamps; without this ffmpeg assumes 25fps
+            '-r', str(CONFIG['capture']['framerate']),
             '-i', str(raw_video_path),
             '-filter:v', f'setpts=PTS/{speedup_factor}',
-            '-c:v', 'libx264',
-            '-preset', video_config['preset'],
-            '-crf', str(video_config['crf']),
+            *self.get_encoder_args(),
             '-pix_fmt', 'yuv420p',
             '-movflags', '+faststart',  # Optimize for web streaming
             str(final_video_path)
         ]
 
         try:
-            self.logger.info("Starting video processing (this may take 5-10 minutes)...")
+            self.logger.info(f"Starting video processing with {encoder}...")
             memory_before = self.get_free_memory()
             start_time = time.time()
 
@@ -673,15 +1169,15 @@ class SunriseTimelapse:
             if final_video_path.exists():
                 size_mb = final_video_path.stat().st_size / (1024 * 1024)
 
-                # Verify video is valid
-                probe_cmd = ['ffprobe', '-v', 'quiet', '-show_entries',
-                           'format=duration', '-of', 'csv=p=0', str(final_video_path)]
-                probe_result = subprocess.run(probe_cmd, capture_output=True, text=True, timeout=30)
-                duration = float(probe_result.stdout.strip()) if probe_result.stdout.strip() else 0
+                # Take the duration from ffmpeg's final stats line rather than re-probing the file
+                duration = self.parse_ffmpeg_duration(result.stderr)
 
                 self.logger.info("=== Video Processing Success ===")
                 self.logger.info(f"Final size: {size_mb:.1f}MB")
-                self.logger.info(f"Duration: {duration:.1f} seconds")
+                if duration is not None:
+                    self.logger.info(f"Duration: {duration:.1f} seconds")
+                else:
+                    self.logger.info(f"Duration: {target_duration:.1f} seconds (target)")
                 self.logger.info(f"Processing time: {creation_time/60:.1f} minutes")
                 self.logger.info(f"Memory used: {memory_before - memory_after}MB")
 
@@ -697,19 +1193,20 @@ class SunriseTimelapse:
             self.logger.error(f"FFmpeg error: {e.stderr}")
             return None
 
-    def take_photo_after_video(self):
+    def take_photo_after_video(self, ctx=None):
         """Take a fresh photo after video recording for weather analysis"""
-        today = datetime.date.today().strftime("%Y-%m-%d")
-        photo_path = Path(CONFIG["paths"]["raw_dir"]) / f"analysis_photo_{today}.jpg"
+        ctx = ctx or self.make_run_context()
+        photo_path = self.raw_dir / f"analysis_photo_{ctx.today_str}.jpg"
 
         self.logger.info("📸 Taking fresh photo for weather analysis...")
 
+        photo_config = CONFIG['analysis_photo']
         cmd = [
             'libcamera-still',
-            '--width', '800',
-            '--height', '800',
-            '--ev', '0.5',
-            '--quality', '90',
+            '--width', str(photo_config['width']),
+            '--height', str(photo_config['height']),
+            '--ev', str(CONFIG['capture']['ev']),
+            '--quality', str(photo_config['quality']),
             '--timeout', '2000',  # 2 second delay for auto-exposure
             '--nopreview',
             '-o', str(photo_path)
@@ -748,13 +1245,9 @@ class SunriseTimelapse:
         if not groq_key or groq_key == 'api_key':
             # Fallback description
             self.logger.info("No Groq API key configured, using fallback description")
-            return "Dawn in Southampton. Again."
+            return FALLBACK_DESCRIPTION
 
         try:
-            # Read and encode image
-            with open(image_path, 'rb') as img_file:
-                img_base64 = base64.b64encode(img_file.read()).decode()
-
             headers = {
                 'Authorization': f"Bearer {groq_key}",
                 'Content-Type': 'application/json'
@@ -773,7 +1266,7 @@ class SunriseTimelapse:
                             {
                                 "type": "image_url",
                                 "image_url": {
-                                    "url": f"data:image/jpeg;base64,{img_base64}"
+                                    "url": f"data:image/jpeg;base64,{IMAGE_PLACEHOLDER}"
                                 },
                             },
                         ],
@@ -784,12 +1277,15 @@ class SunriseTimelapse:
             }
 
             self.logger.info("Sending image to Groq for weather description...")
-            response = requests.post(
-                'https://api.groq.com/openai/v1/chat/completions',
-                headers=headers,
-                json=data,
-                timeout=30
-            )
+            # Stream the base64 image into the JSON body straight from a memory map
+            with open(image_path, 'rb') as img_file, \
+                    mmap.mmap(img_file.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                response = self.http.post(
+                    'https://api.groq.com/openai/v1/chat/completions',
+                    headers=headers,
+                    data=StreamingJSONBody(data, IMAGE_PLACEHOLDER, mm),
+                    timeout=30
+                )
 
             if response.status_code == 200:
                 result = response.json()
@@ -803,32 +1299,38 @@ class SunriseTimelapse:
             self.logger.error(f"Error generating AI description: {e}")
 
         # Fallback description if API fails
-        return "Dawn in Southampton. Again."
-
-    def post_to_bluesky(self, video_path, description, sunrise_time):
-        """Post video and description to Bluesky using FIXED video API"""
-        bluesky_config = CONFIG['bluesky']
-
-        if (
-            bluesky_config["handle"] == "handle.bsky.social"
-            or bluesky_config["password"] == ""
-        ):
-            self.logger.warning("Bluesky credentials not configured, skipping post")
-            return False
+        return FALLBACK_DESCRIPTION
+
+    def has_bluesky_credentials(self):
+        """Whether a real Bluesky handle and password are configured"""
+        cfg = CONFIG['bluesky']
+        return cfg['password'] != '' and cfg['handle'] != 'handle.bsky.social'
+
+    def upload_to_bluesky(self, video_path, session=None):
+        """Log in and upload the video, returning (client, video_result) or None
+
+        Pass session only from the thread that owns it; otherwise the client makes its own.
+        """
+        cfg = CONFIG['bluesky']
+        handle, password = cfg['handle'], cfg['password']
+        if not self.has_bluesky_credentials():
+            # Expected on dev setups, so not worth a warning
+            self.logger.debug("Bluesky credentials not configured, skipping post")
+            return None
 
         try:
             # Use the FIXED client class
-            client = FixedBlueSkyClient()
+            client = FixedBlueSkyClient(session=session)
 
             self.logger.info("Logging into Bluesky...")
-            if not client.create_session(bluesky_config['handle'], bluesky_config['password']):
-                return False
+            if not client.create_session(handle, password):
+                return None
 
             # Check file size
             size_mb = video_path.stat().st_size / (1024 * 1024)
-            if size_mb > 50:
+            if size_mb > CONFIG['video']['max_size_mb']:
                 self.logger.error(f"Video too large for Bluesky: {size_mb:.1f}MB")
-                return False
+                return None
 
             self.logger.info(f"Uploading video ({size_mb:.1f}MB) to Bluesky using video API...")
 
@@ -836,11 +1338,23 @@ class SunriseTimelapse:
             video_result = client.upload_video(video_path)
             if not video_result:
                 self.logger.error("Video upload failed")
-                return False
+                return None
+
+            return client, video_result
+
+        except Exception as e:
+            self.logger.error(f"Error uploading to Bluesky: {e}")
+            return None
+
+    def create_bluesky_post(self, upload, description, ctx):
+        """Create the Bluesky post for an uploaded video"""
+        if not upload:
+            return False
+        client, video_result = upload
 
+        try:
             # Add date to description
-            today_formatted = datetime.date.today().strftime('%Y-%m-%d')  # e.g., "2025-06-01"
-            description_with_date = f"{description}\n\nSunrise: {sunrise_time.strftime('%H:%M:%S')} {today_formatted}"
+            description_with_date = f"{description}\n\nSunrise: {ctx.sunrise_str} {ctx.today_str}"
             self.logger.info("Creating post with video...")
             post_result = client.create_post_with_video(
                 text=description_with_date,
@@ -869,54 +1383,117 @@ class SunriseTimelapse:
             self.logger.error(f"Error posting to Bluesky: {e}")
             return False
 
-    def cleanup_old_files(self):
+    def post_to_bluesky(self, video_path, description, ctx):
+        """Post video and description to Bluesky using FIXED video API"""
+        # Single-threaded path, so the Groq session can be shared
+        upload = self.upload_to_bluesky(video_path, session=self.http)
+        return self.create_bluesky_post(upload, description, ctx)
+
+    def queue_for_posting(self, video_path, photo_path, ctx):
+        """Write an outbox manifest for the poster service, returning its path"""
+        manifest = {
+            "video": str(video_path),
+            "photo": str(photo_path) if photo_path else None,
+            "today": ctx.today.isoformat(),
+            "sunrise": ctx.sunrise.isoformat(),
+        }
+        manifest_path = PATHS['outbox_dir'] / f"sunrise_{ctx.today_str}.json"
+        self.write_manifest(manifest_path, manifest)
+        self.logger.info(f"Queued for posting: {manifest_path}")
+        return manifest_path
+
+    def write_manifest(self, manifest_path, manifest):
+        """Write an outbox manifest atomically so the poster never sees a partial file"""
+        tmp_path = manifest_path.with_suffix('.json.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(manifest, f)
+        os.replace(tmp_path, manifest_path)
+
+    def post_from_outbox(self):
+        """Post every queued manifest, deleting each on success. Returns True if all posted"""
+        # Checked up front so a misconfigured poster doesn't pay for Groq on every run
+        if not self.has_bluesky_credentials():
+            self.logger.warning("Bluesky credentials not configured, leaving outbox queued")
+            return False
+
+        all_posted = True
+        for manifest_path in sorted(PATHS['outbox_dir'].glob("sunrise_*.json")):
+            try:
+                with open(manifest_path) as f:
+                    manifest = json.load(f)
+                ctx = self.make_run_context(
+                    datetime.date.fromisoformat(manifest['today']),
+                    datetime.datetime.fromisoformat(manifest['sunrise'])
+                )
+                video_path = Path(manifest['video'])
+            except (OSError, ValueError, KeyError) as e:
+                self.logger.error(f"Unreadable manifest {manifest_path.name}: {e}")
+                all_posted = False
+                continue
+
+            if not video_path.exists():
+                self.logger.error(f"Video for {manifest_path.name} is gone, dropping manifest")
+                manifest_path.unlink()
+                continue
+
+            self.logger.info(f"Posting {video_path.name} from outbox...")
+            photo_path = Path(manifest['photo']) if manifest.get('photo') else None
+            # Reuse a description generated on an earlier attempt
+            description = manifest.get('description')
+            if not description and photo_path and photo_path.exists():
+                description = self.generate_ai_description(photo_path)
+                if description != FALLBACK_DESCRIPTION:
+                    # Keep it so retries don't call Groq again
+                    manifest['description'] = description
+                    self.write_manifest(manifest_path, manifest)
+            elif not description:
+                description = NO_PHOTO_DESCRIPTION
+
+            if self.post_to_bluesky(video_path, description, ctx):
+                manifest_path.unlink()
+            else:
+                # Leave the manifest for the next run to retry
+                self.logger.warning(f"Posting failed, keeping {manifest_path.name} queued")
+                all_posted = False
+
+        return all_posted
+
+    def purge_dated_files(self, directory, prefix, suffix, cutoff_ordinal):
+        """Delete prefixYYYY-MM-DDsuffix files dated before cutoff_ordinal, returning the count"""
+        removed = 0
+        start = len(prefix)
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                name = entry.name
+                if not (name.startswith(prefix) and name.endswith(suffix)
+                        and len(name) == start + 10 + len(suffix)):
+                    continue
+                match = _DATE_RE.fullmatch(name, start, start + 10)
+                if not match:
+                    continue
+                try:
+                    item_date = datetime.date(*map(int, match.groups()))
+                except ValueError:
+                    continue  # e.g. month 13
+                if item_date.toordinal() < cutoff_ordinal:
+                    os.unlink(entry.path)
+                    removed += 1
+                    self.logger.info("Removed old file: %s", name)
+        return removed
+
+    def cleanup_old_files(self, ctx=None):
         """Clean up old videos and raw files"""
-        if not CONFIG['cleanup']['auto_cleanup']:
+        if not self.auto_cleanup:
             return
 
-        keep_days = CONFIG['cleanup']['keep_days']
-        cutoff_date = datetime.date.today() - datetime.timedelta(days=keep_days)
+        today = ctx.today if ctx else datetime.date.today()
+        cutoff_ordinal = today.toordinal() - self.keep_days
 
-        self.logger.info(f"Cleaning up files older than {keep_days} days...")
+        self.logger.info(f"Cleaning up files older than {self.keep_days} days...")
 
-        # Clean raw videos
-        raw_dir = Path(CONFIG['paths']['raw_dir'])
-        removed_raw = 0
-        for item in raw_dir.glob("sunrise_raw_*.h264"):
-            try:
-                date_str = item.stem.replace('sunrise_raw_', '')
-                item_date = datetime.datetime.strptime(date_str, '%Y-%m-%d').date()
-                if item_date < cutoff_date:
-                    item.unlink()
-                    removed_raw += 1
-                    self.logger.info(f"Removed old raw video: {item.name}")
-            except ValueError:
-                pass
-
-        # Clean analysis photos
-        for item in raw_dir.glob("analysis_photo_*.jpg"):
-            try:
-                date_str = item.stem.replace('analysis_photo_', '')
-                item_date = datetime.datetime.strptime(date_str, '%Y-%m-%d').date()
-                if item_date < cutoff_date:
-                    item.unlink()
-                    self.logger.info(f"Removed old photo: {item.name}")
-            except ValueError:
-                pass
-
-        # Clean final videos
-        video_dir = Path(CONFIG['paths']['video_dir'])
-        removed_videos = 0
-        for item in video_dir.glob("sunrise_*.mp4"):
-            try:
-                date_str = item.stem.replace('sunrise_', '')
-                item_date = datetime.datetime.strptime(date_str, '%Y-%m-%d').date()
-                if item_date < cutoff_date:
-                    item.unlink()
-                    removed_videos += 1
-                    self.logger.info(f"Removed old video: {item.name}")
-            except ValueError:
-                pass
+        removed_raw = self.purge_dated_files(self.raw_dir, 'sunrise_raw_', '.h264', cutoff_ordinal)
+        self.purge_dated_files(self.raw_dir, 'analysis_photo_', '.jpg', cutoff_ordinal)
+        removed_videos = self.purge_dated_files(self.video_dir, 'sunrise_', '.mp4', cutoff_ordinal)
 
         if removed_raw > 0 or removed_videos > 0:
             self.logger.info(f"Cleanup complete: {removed_raw} raw videos, {removed_videos} final videos removed")
@@ -931,10 +1508,10 @@ def main():
 
     try:
         # Show today's sunrise info
-        sunrise_time = timelapse.get_sunrise_time()
-        start_time = sunrise_time - datetime.timedelta(minutes=CONFIG['capture']['start_before_sunrise_minutes'])
+        ctx = timelapse.make_run_context()
+        start_time = ctx.sunrise - datetime.timedelta(minutes=CONFIG['capture']['start_before_sunrise_minutes'])
 
-        print(f"Today's sunrise: {sunrise_time.strftime('%H:%M:%S')}")
+        print(f"Today's sunrise: {ctx.sunrise_str}")
         print(f"Capture starts: {start_time.strftime('%H:%M:%S')}")
         print(f"Capture duration: {CONFIG['capture']['duration_minutes']} minutes")
         print(f"Method: Continuous video at {CONFIG['capture']['framerate']}fps")
@@ -942,34 +1519,57 @@ def main():
         print(f"Bluesky upload: Using video.bsky.app API")
         print()
 
-        # Capture sunrise as video
-        raw_video_path = timelapse.capture_sunrise_video()
+        if CONFIG['capture']['pipe_to_ffmpeg']:
+            # Capture and build the timelapse in one pass
+            final_video_path = timelapse.capture_sunrise_timelapse(ctx)
+        else:
+            # Capture sunrise as video
+            raw_video_path = timelapse.capture_sunrise_video(ctx)
 
-        if not raw_video_path:
-            timelapse.logger.error("Video capture failed")
-            return False
+            if not raw_video_path:
+                timelapse.logger.error("Video capture failed")
+                return False
 
-        # Create final timelapse
-        final_video_path = timelapse.create_timelapse_from_video(raw_video_path)
+            # Create final timelapse
+            final_video_path = timelapse.create_timelapse_from_video(raw_video_path, ctx)
 
-        if final_video_path and final_video_path.exists():
-            # Take fresh photo for weather analysis
-            analysis_photo = timelapse.take_photo_after_video()
+        if final_video_path and final_video_path.exists() and CONFIG['outbox']['enabled']:
+            # Hand off to the poster service and release the camera/CPU straight away
+            analysis_photo = timelapse.take_photo_after_video(ctx)
+            timelapse.queue_for_posting(final_video_path, analysis_photo, ctx)
+            timelapse.cleanup_old_files(ctx)
 
-            # Generate weather description
-            if analysis_photo:
-                description = timelapse.generate_ai_description(analysis_photo)
-            else:
-                description = "This morning in Southampton the weather is looking beautiful for this sunrise timelapse! 🌅"
+            timelapse.logger.info("=== SUCCESS ===")
+            timelapse.logger.info(f"Final video: {final_video_path}")
+            timelapse.logger.info("Sunrise timelapse captured, posting left to the outbox poster")
+            return True
+        elif final_video_path and final_video_path.exists():
+            # Start the Bluesky upload immediately when video is ready
+            timelapse.logger.info("Video processing complete, uploading to Bluesky now...")
+
+            # Photo and description run alongside the upload (both are network/IO bound).
+            # The upload gets its own session; build the main thread's one up front
+            # so the lazy property never races.
+            timelapse.http
+            with concurrent.futures.ThreadPoolExecutor(max_workers=1) as executor:
+                upload_future = executor.submit(timelapse.upload_to_bluesky, final_video_path)
+
+                # Take fresh photo for weather analysis
+                analysis_photo = timelapse.take_photo_after_video(ctx)
+
+                # Generate weather description
+                if analysis_photo:
+                    description = timelapse.generate_ai_description(analysis_photo)
+                else:
+                    description = NO_PHOTO_DESCRIPTION
 
-            # Post to Bluesky immediately when video is ready
-            timelapse.logger.info("Video processing complete, posting to Bluesky now...")
+                upload = upload_future.result()
 
             # Post to Bluesky using FIXED video API
-            posted = timelapse.post_to_bluesky(final_video_path, description,sunrise_time)
+            posted = timelapse.create_bluesky_post(upload, description, ctx)
 
             # Clean up old files
-            timelapse.cleanup_old_files()
+            timelapse.cleanup_old_files(ctx)
 
             timelapse.logger.info("=== SUCCESS ===")
             timelapse.logger.info(f"Final video: {final_video_path}")
@@ -992,6 +1592,26 @@ def main():
         timelapse.logger.error(f"Unexpected error: {e}")
         return False
 
+def post_outbox_main():
+    """Post any videos queued in the outbox (run by the poster service)"""
+    timelapse = SunriseTimelapse()
+    try:
+        return timelapse.post_from_outbox()
+    except Exception as e:
+        timelapse.logger.error(f"Unexpected error posting from outbox: {e}")
+        return False
+
 if __name__ == "__main__":
-    success = main()
+    parser = argparse.ArgumentParser(description="Capture and post a sunrise timelapse")
+    parser.add_argument(
+        '--post-outbox',
+        action='store_true',
+        help="post queued timelapses from the outbox instead of capturing"
+    )
+    args = parser.parse_args()
+
+    if args.post_outbox:
+        success = post_outbox_main()
+    else:
+        success = main()
     sys.exit(0 if success else 1)